@@ -7,6 +7,15 @@ import tempfile
 import subprocess
 import threading
 import json
+import queue
+import itertools
+import math
+import heapq
+import sqlite3
+import collections
+import string
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from array import array
 from pathlib import Path
 
 # --- Core Dependencies ---
@@ -18,11 +27,11 @@ import sounddevice as sd
 import soundfile as sf
 import requests
 import psutil
+import numpy as np
 
 # --- Optional Dependencies ---
 try:
     import noisereduce as nr
-    import numpy as np
     HAS_NR = True
 except ImportError:
     HAS_NR = False
@@ -62,6 +71,21 @@ try:
     HAS_SPOTIPY = True
 except ImportError:
     HAS_SPOTIPY = False
+try:
+    import webrtcvad
+    HAS_VAD = True
+except ImportError:
+    HAS_VAD = False
+try:
+    from pypdf import PdfReader
+    HAS_PDF = True
+except ImportError:
+    HAS_PDF = False
+try:
+    import docx
+    HAS_DOCX = True
+except ImportError:
+    HAS_DOCX = False
 
 # ----------------------------------------
 
@@ -71,11 +95,15 @@ except ImportError:
 # ==============================================================================
 try:
     SCRIPT_DIR = Path(__file__).parent
-    with open(SCRIPT_DIR / "config.json", "r") as f:
+    CONFIG_PATH = SCRIPT_DIR / "config.json"
+    with open(CONFIG_PATH, "r") as f:
         CONFIG = json.load(f)
     
     TTS_CACHE_DIR = SCRIPT_DIR / CONFIG['paths']['tts_cache_dir']
     TTS_CACHE_DIR.mkdir(exist_ok=True)
+    # Fragments are spliced together, so they must all come from the same voice.
+    FRAGMENT_CACHE_DIR = TTS_CACHE_DIR / "fragments" / Path(CONFIG['paths']['voice_model']).stem
+    FRAGMENT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 except Exception as e:
     print(f"FATAL ERROR loading config.json: {e}")
@@ -87,6 +115,11 @@ is_speaking = threading.Event()
 is_recording = threading.Event()
 mic_lock = threading.Lock()
 sp = None # Spotify object
+# Live config plus the structures derived from it. Reloads replace the whole dict in one
+# assignment, so a command that grabs it once sees a consistent set.
+#   command_index: keyword matchers and type -> command map, from CONFIG['commands']
+#   janitor_map:   extension -> destination folder, from CONFIG['janitor']['rules']
+runtime = {"config": CONFIG, "command_index": {"matchers": [], "by_type": {}}, "janitor_map": {}}
 
 # --- NEW: Context and Memory Globals ---
 last_context = {"file": None, "search": None, "app": None}
@@ -95,6 +128,60 @@ watchdog_data = {}
 MEMORY_FILE_PATH = SCRIPT_DIR / CONFIG['paths']['memory_file']
 CLIPBOARD_LOG_PATH = SCRIPT_DIR / CONFIG['paths']['clipboard_log']
 WATCHDOG_FILE_PATH = SCRIPT_DIR / CONFIG['paths']['watchdog_file']
+CONTENT_INDEX_PATH = SCRIPT_DIR / CONFIG['paths']['content_index']
+
+# --- VAD Endpointing (16 kHz / 30 ms frames are what webrtcvad accepts) ---
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30
+VAD_FRAME_SAMPLES = VAD_SAMPLE_RATE * VAD_FRAME_MS // 1000
+
+# --- Speech Output Scheduler ---
+SPEECH_CRITICAL, SPEECH_NORMAL, SPEECH_CHATTER = 0, 1, 2
+SPEECH_BLOCK_FRAMES = 1024 # ~46 ms at Piper's 22.05 kHz; bounds barge-in latency
+speech_queue = queue.PriorityQueue()
+speech_pending = {} # key_or_text -> queued/playing item, used for coalescing
+speech_state_lock = threading.Lock()
+speech_interrupt = threading.Event()
+speech_seq = itertools.count()
+current_speech = None
+# Each PTT command thread records the generation it started in; a barge-in bumps the
+# generation so speech from the interrupted command is dropped instead of playing over
+# the pilot's next capture. Threads outside a PTT flow (startup, shutdown) have none.
+speech_generation = 0
+speech_context = threading.local()
+dialogue_cache_locks = {} # cache file name -> Lock, shared by the speech worker and prewarm thread
+
+# --- Templated Speech (fragment cache) ---
+FRAGMENT_CROSSFADE_MS = 15
+FRAGMENT_EDGE_PAD_MS = 40 # Silence kept around a trimmed fragment
+FRAGMENT_MAX_CACHED_CHARS = 40 # Longer slot values (e.g. file names) are synthesized but not kept
+FRAGMENT_PREWARM_WORDS = [str(n) for n in range(101)] + ["hundred"]
+fragment_audio = {} # text -> (samples, samplerate), in-memory layer over FRAGMENT_CACHE_DIR
+fragment_locks = {} # text -> Lock, so the prewarm thread and speech worker never render one fragment twice
+
+TEMPLATE_TIME = "The time is {hour} {minute}."
+TEMPLATE_BRIGHTNESS = "Brightness set to {value} percent."
+TEMPLATE_STATUS = "All systems nominal. CPU at {cpu} percent. Memory at {mem} percent."
+TEMPLATE_BATTERY = " Battery is at {battery} percent."
+TEMPLATE_MOVED = "Moved {name} to {dest}."
+# Templates joined at runtime are listed joined too: the seam ("percent. Battery is at") is its own fragment.
+SPEECH_TEMPLATES = (TEMPLATE_TIME, TEMPLATE_BRIGHTNESS, TEMPLATE_STATUS, TEMPLATE_STATUS + TEMPLATE_BATTERY,
+                    TEMPLATE_MOVED)
+
+# --- Document Content Index (BM25) ---
+BM25_K1, BM25_B = 1.2, 0.75
+CONTENT_MAX_CHARS = 2_000_000 # Text kept per document
+CONTENT_TOKEN_RE = re.compile(r"[a-z0-9]+")
+CONTENT_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with "
+    "about document documents file files my".split())
+
+# --- Config Hot Reload ---
+CONFIG_POLL_SECONDS = 1.0
+RESTART_ONLY_SECTIONS = ("paths", "spotify")
+
+# --- Janitor ---
+JANITOR_PARTIAL_BYTES = 64 * 1024 # Prefix hashed before committing to a full-file hash
 
 # ==============================================================================
 # ---------- CORE HELPER FUNCTIONS (speak, transcribe, etc.) ----------
@@ -109,58 +196,230 @@ def sanitize_for_filename(text: str) -> str:
     safe_text = "".join(c for c in safe_text if c.isalnum() or c in " _-").strip()
     return safe_text[:75] + ".wav"
 
-def speak(key_or_text: str):
-    if is_speaking.is_set(): return
-    is_speaking.set()
-
-    output_file_path = None
-    is_temp_file = False
+def run_piper(text: str, output_file):
+    cmd = [str(SCRIPT_DIR / CONFIG['paths']['piper_exe']), 
+           "-m", str(SCRIPT_DIR / CONFIG['paths']['voice_model']), 
+           "--output_file", str(output_file)]
+    subprocess.run(cmd, input=text.encode("utf-8"), check=True, 
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
+def cache_dialogue_line(text: str):
+    """
+    Returns (cache_file, was_cached), rendering the line first if needed. Piper writes
+    to a temp file that is renamed into place, so a reader never sees a partial WAV.
+    """
+    cache_file = TTS_CACHE_DIR / sanitize_for_filename(text)
+    with dialogue_cache_locks.setdefault(cache_file.name, threading.Lock()):
+        if cache_file.exists(): return cache_file, True
+        with tempfile.NamedTemporaryFile(dir=TTS_CACHE_DIR, suffix=".tmp.wav", delete=False) as f:
+            temp_wav = f.name
+        try:
+            run_piper(text, temp_wav)
+            os.replace(temp_wav, cache_file)
+        finally:
+            if os.path.exists(temp_wav): os.remove(temp_wav)
+        return cache_file, False
+
+def synthesize_speech(key_or_text: str):
+    """Returns (wav_path, is_temp_file). Dialogue pool lines are cached on disk."""
+    if key_or_text in CONFIG['dialogue_pools']:
+        text = random.choice(CONFIG['dialogue_pools'][key_or_text])
+        cache_file, was_cached = cache_dialogue_line(text)
+        safe_print(f"BT-7274 (Cached): {text}" if was_cached else f"BT-7274 (Caching): {text}")
+        return cache_file, False
+
+    safe_print(f"BT-7274 (Generating): {key_or_text}")
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        temp_wav = f.name
+    run_piper(key_or_text, temp_wav)
+    return temp_wav, True
+
+def play_audio(data, samplerate) -> bool:
+    """Streams samples in small blocks so a barge-in stops it within one block."""
+    if data.ndim == 1: data = data.reshape(-1, 1)
+    with sd.OutputStream(samplerate=samplerate, channels=data.shape[1], dtype="float32",
+                         blocksize=SPEECH_BLOCK_FRAMES, latency="low") as stream:
+        for start in range(0, len(data), SPEECH_BLOCK_FRAMES):
+            if speech_interrupt.is_set():
+                stream.abort()
+                return False
+            stream.write(data[start:start + SPEECH_BLOCK_FRAMES])
+    return True
+
+def trim_silence(data, samplerate):
+    """Cuts Piper's leading/trailing silence down to a short pad so fragments join tightly."""
+    if data.ndim > 1: data = data.mean(axis=1)
+    loud = np.flatnonzero(np.abs(data) > 0.02 * (np.abs(data).max() or 1.0))
+    if not len(loud): return data
+    pad = int(samplerate * FRAGMENT_EDGE_PAD_MS / 1000)
+    return data[max(0, loud[0] - pad):loud[-1] + pad + 1]
+
+def render_fragment(text: str):
+    """Runs Piper for one fragment and trims it. Returns (samples, samplerate)."""
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        temp_wav = f.name
     try:
-        if key_or_text in CONFIG['dialogue_pools']:
-            is_temp_file = False
-            text = random.choice(CONFIG['dialogue_pools'][key_or_text])
-            cache_file = TTS_CACHE_DIR / sanitize_for_filename(text)
-            output_file_path = cache_file
-
-            if not cache_file.exists():
-                safe_print(f"BT-7274 (Caching): {text}")
-                cmd = [str(SCRIPT_DIR / CONFIG['paths']['piper_exe']), 
-                       "-m", str(SCRIPT_DIR / CONFIG['paths']['voice_model']), 
-                       "--output_file", str(cache_file)]
-                subprocess.run(cmd, input=text.encode("utf-8"), check=True, 
-                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            else:
-                safe_print(f"BT-7274 (Cached): {text}")
-        
-        else:
-            is_temp_file = True
-            text = key_or_text
-            safe_print(f"BT-7274 (Generating): {text}")
+        run_piper(text, temp_wav)
+        data, samplerate = sf.read(temp_wav, dtype="float32")
+    finally:
+        os.remove(temp_wav)
+    return trim_silence(data, samplerate), samplerate
 
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-                temp_wav = f.name
-            output_file_path = temp_wav
-            
-            cmd = [str(SCRIPT_DIR / CONFIG['paths']['piper_exe']), 
-                   "-m", str(SCRIPT_DIR / CONFIG['paths']['voice_model']), 
-                   "--output_file", str(temp_wav)]
-            subprocess.run(cmd, input=text.encode("utf-8"), check=True, 
-                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+def load_fragment(text: str, cache: bool = True):
+    """Returns (samples, samplerate) for one fragment, running Piper only the first time."""
+    if text in fragment_audio: return fragment_audio[text]
+    if not cache: return render_fragment(text)
 
-        if output_file_path and Path(output_file_path).exists():
-            data, samplerate = sf.read(output_file_path, dtype="float32")
-            sd.play(data, samplerate)
-            sd.wait()
+    with fragment_locks.setdefault(text, threading.Lock()):
+        if text in fragment_audio: return fragment_audio[text]
+        cache_file = FRAGMENT_CACHE_DIR / (hashlib.md5(text.encode("utf-8")).hexdigest() + ".wav")
+        try:
+            data, samplerate = sf.read(cache_file, dtype="float32")
+        except Exception:
+            # Missing or unreadable (e.g. left over from a crash): render it again.
+            data, samplerate = render_fragment(text)
+            # Write beside the final file and rename, so readers never see a partial WAV.
+            with tempfile.NamedTemporaryFile(dir=FRAGMENT_CACHE_DIR, suffix=".tmp.wav", delete=False) as f:
+                temp_wav = f.name
+            try:
+                sf.write(temp_wav, data, samplerate)
+                os.replace(temp_wav, cache_file)
+            except Exception:
+                if os.path.exists(temp_wav): os.remove(temp_wav)
+                raise
+        fragment_audio[text] = (data, samplerate)
+        return data, samplerate
+
+def crossfade_concat(pieces, samplerate):
+    """Joins mono clips, blending each seam over FRAGMENT_CROSSFADE_MS."""
+    fade = int(samplerate * FRAGMENT_CROSSFADE_MS / 1000)
+    out = pieces[0]
+    for piece in pieces[1:]:
+        n = min(fade, len(out), len(piece))
+        ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)
+        seam = out[len(out) - n:] * (1.0 - ramp) + piece[:n] * ramp
+        out = np.concatenate([out[:len(out) - n], seam, piece[n:]])
+    return out
+
+def compose_template(template: str, slots: dict):
+    """Renders a template from cached fragments: one per static run of text and one per slot value."""
+    parts = []
+    for literal, field, spec, _ in string.Formatter().parse(template):
+        if literal.strip(): parts.append((literal.strip(), True))
+        if field is not None:
+            value = format(slots[field], spec).strip()
+            parts.append((value, len(value) <= FRAGMENT_MAX_CACHED_CHARS))
+    clips = [load_fragment(text, cache) for text, cache in parts if any(c.isalnum() for c in text)]
+    samplerate = clips[0][1]
+    if any(rate != samplerate for _, rate in clips):
+        raise ValueError("fragments have mismatched sample rates")
+    return crossfade_concat([data for data, _ in clips], samplerate), samplerate
+
+def prewarm_fragments():
+    """Loads (or renders once) the static template text and common number tokens."""
+    texts = [literal.strip() for template in SPEECH_TEMPLATES
+             for literal, _, _, _ in string.Formatter().parse(template) if any(c.isalnum() for c in literal)]
+    for text in texts + FRAGMENT_PREWARM_WORDS:
+        try: load_fragment(text)
+        except Exception as e:
+            safe_print(f"ERROR: Could not pre-render fragment '{text}': {e}")
+            return
 
-    except Exception as e:
-        safe_print(f"ERROR in speak: {e}")
-    
-    finally:
-        is_speaking.clear()
-        if is_temp_file and output_file_path and Path(output_file_path).exists():
-            try: os.remove(output_file_path)
-            except Exception: pass
+def speak(key_or_text: str, priority: int = SPEECH_NORMAL, wait: bool = False, template=None):
+    """
+    Queues an utterance for the speech scheduler. A line that is already queued or
+    playing is coalesced rather than repeated. A critical line cuts off chatter
+    that is currently playing. With wait=True, blocks until it has been spoken
+    (or dropped by a barge-in) and returns False if it was cut short.
+    """
+    with speech_state_lock:
+        generation = getattr(speech_context, "generation", None)
+        if generation is not None and generation != speech_generation:
+            return False # This command was barged in on
+        item = speech_pending.get(key_or_text)
+        if item is None:
+            item = {"key": key_or_text, "priority": priority, "template": template,
+                    "done": threading.Event(), "interrupted": False}
+            speech_pending[key_or_text] = item
+            speech_queue.put((priority, next(speech_seq), item))
+        elif priority < item["priority"] and item is not current_speech:
+            # Re-queue at the higher priority; the stale entry is skipped once done.
+            item["priority"] = priority
+            speech_queue.put((priority, next(speech_seq), item))
+
+        if (priority == SPEECH_CRITICAL and current_speech is not None
+                and current_speech["priority"] == SPEECH_CHATTER):
+            speech_interrupt.set()
+
+    if wait:
+        item["done"].wait()
+        return not item["interrupted"]
+
+def speak_template(template: str, priority: int = SPEECH_NORMAL, wait: bool = False, **slots):
+    """
+    Speaks a templated reply such as TEMPLATE_BRIGHTNESS. The static text and any
+    slot value heard before come from the fragment cache, so common replies play
+    without running Piper at all.
+    """
+    speak(template.format(**slots), priority, wait, template=(template, slots))
+
+def wait_for_speech():
+    """Blocks until every queued utterance has been spoken."""
+    while speech_pending: time.sleep(0.05)
+
+def interrupt_speech():
+    """Barge-in: silences current playback, drops everything queued and mutes the interrupted command."""
+    global speech_generation
+    with speech_state_lock:
+        speech_generation += 1
+        for item in speech_pending.values():
+            item["interrupted"] = True
+            item["done"].set()
+        speech_pending.clear()
+        speech_interrupt.set()
+
+def speech_worker():
+    """Single consumer of the speech queue; the only thread that touches the audio device."""
+    global current_speech
+    while True:
+        _, _, item = speech_queue.get()
+        with speech_state_lock:
+            if item["done"].is_set(): continue
+            current_speech = item
+            speech_interrupt.clear()
+
+        output_file_path, is_temp_file = None, False
+        is_speaking.set()
+        try:
+            composed = None
+            if item["template"]:
+                try:
+                    composed = compose_template(*item["template"])
+                    safe_print(f"BT-7274 (Composed): {item['key']}")
+                except Exception as e:
+                    safe_print(f"WARNING: Fragment composition failed, synthesizing in full: {e}")
+            if composed:
+                finished = play_audio(*composed)
+            else:
+                output_file_path, is_temp_file = synthesize_speech(item["key"])
+                finished = not Path(output_file_path).exists() or \
+                    play_audio(*sf.read(output_file_path, dtype="float32", always_2d=True))
+            if not finished: item["interrupted"] = True
+        except Exception as e:
+            safe_print(f"ERROR in speak: {e}")
+        finally:
+            is_speaking.clear()
+            with speech_state_lock:
+                current_speech = None
+                if speech_pending.get(item["key"]) is item:
+                    del speech_pending[item["key"]]
+            item["done"].set()
+            if is_temp_file and output_file_path and Path(output_file_path).exists():
+                try: os.remove(output_file_path)
+                except Exception: pass
+
+def start_speech_scheduler():
+    threading.Thread(target=speech_worker, daemon=True).start()
 
 def reduce_noise_if_available(audio: sr.AudioData) -> sr.AudioData:
     if not HAS_NR: return audio
@@ -192,12 +451,71 @@ def transcribe_audio(audio: sr.AudioData) -> str:
         speak("Pilot, my connection to command is down.")
         return "None"
 
+def open_microphone() -> sr.Microphone:
+    """Opens the mic with a chunk size of exactly one VAD frame."""
+    return sr.Microphone(sample_rate=VAD_SAMPLE_RATE, chunk_size=VAD_FRAME_SAMPLES)
+
+def is_speech_frame(frame: bytes, vad, threshold: float) -> bool:
+    """Classifies one 16-bit mono frame. Falls back to RMS energy without webrtcvad."""
+    if vad is not None:
+        return vad.is_speech(frame, VAD_SAMPLE_RATE)
+    samples = array('h', frame)
+    if sys.byteorder == "big": samples.byteswap()
+    rms = (sum(s * s for s in samples) / len(samples)) ** 0.5
+    return rms > threshold
+
+def listen_with_vad(source, profile_name: str):
+    """
+    Records one utterance frame by frame and stops as soon as the pilot has been
+    silent for the profile's hangover time, instead of running to the phrase limit.
+    Raises sr.WaitTimeoutError if no speech starts within the profile's timeout.
+    """
+    profile = CONFIG['vad']['profiles'][profile_name]
+    aggressiveness = min(3, max(0, int(profile['aggressiveness'])))
+    vad = webrtcvad.Vad(aggressiveness) if HAS_VAD else None
+    threshold = recognizer.energy_threshold * (1.0 + 0.25 * aggressiveness)
+
+    onset_frames = max(1, int(profile['onset_ms']) // VAD_FRAME_MS)
+    hangover_frames = max(1, int(profile['hangover_ms']) // VAD_FRAME_MS)
+    timeout_frames = int(profile['timeout'] * 1000) // VAD_FRAME_MS
+    limit_frames = int(profile['phrase_time_limit'] * 1000) // VAD_FRAME_MS
+    preroll = collections.deque(maxlen=max(onset_frames, int(profile['preroll_ms']) // VAD_FRAME_MS))
+    frame_bytes = VAD_FRAME_SAMPLES * source.SAMPLE_WIDTH
+
+    frames, voiced_run, silent_run, waited = [], 0, 0, 0
+    while True:
+        frame = source.stream.read(VAD_FRAME_SAMPLES)
+        if len(frame) < frame_bytes: break
+        speech = is_speech_frame(frame, vad, threshold)
+
+        if not frames:
+            # Waiting for onset: keep a short pre-roll so the first syllable isn't clipped.
+            preroll.append(frame)
+            voiced_run = voiced_run + 1 if speech else 0
+            if voiced_run >= onset_frames:
+                frames.extend(preroll)
+                continue
+            waited += 1
+            if waited >= timeout_frames:
+                raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+            continue
+
+        frames.append(frame)
+        silent_run = 0 if speech else silent_run + 1
+        if silent_run >= hangover_frames or len(frames) >= limit_frames:
+            break
+
+    if not frames: return None
+    return sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
 def get_confirmation() -> bool:
-    speak("confirmation")
+    # A barge-in over the prompt means the pilot is issuing a new command, not answering.
+    if not speak("confirmation", SPEECH_CRITICAL, wait=True):
+        return False
     with mic_lock:
         try:
-            with sr.Microphone() as source:
-                audio = recognizer.listen(source, timeout=4, phrase_time_limit=3)
+            with open_microphone() as source:
+                audio = listen_with_vad(source, "confirmation")
             text = transcribe_audio(audio)
             return any(word in text for word in CONFIG['confirmation_words'])
         except sr.WaitTimeoutError:
@@ -225,6 +543,494 @@ def save_memory_file(file_path, data):
     except Exception as e:
         safe_print(f"ERROR: Could not save {file_path}: {e}")
 
+# ==============================================================================
+# ---------- CONFIG VALIDATION & HOT RELOAD ----------
+# ==============================================================================
+
+def validate_config(cfg) -> list:
+    """
+    Checks a parsed config against the shape the rest of the script relies on.
+    Returns a list of "location: problem" strings; an empty list means valid.
+    """
+    errors = []
+
+    def check(path, value, kind, expected):
+        if isinstance(value, kind) and isinstance(value, bool) == (kind is bool):
+            return True
+        if value is None: errors.append(f"{path}: missing (expected {expected})")
+        else: errors.append(f"{path}: expected {expected}, got {type(value).__name__}")
+        return False
+
+    def check_range(path, value, kind, expected, low, high=None):
+        if not check(path, value, kind, expected): return
+        if value < low or (high is not None and value > high):
+            bounds = f"between {low} and {high}" if high is not None else f"at least {low}"
+            errors.append(f"{path}: must be {bounds}, got {value}")
+
+    def entries(section):
+        return [(k, v) for k, v in section.items() if k != "_comment"]
+
+    def string_map(path, section):
+        if check(path, section, dict, "object"):
+            for name, value in entries(section):
+                check(f"{path}.{name}", value, str, "string")
+
+    if not check("config", cfg, dict, "object"): return errors
+    for section in ("paths", "settings", "vad", "janitor", "content_index", "dialogue_pools", "commands", "macros",
+                    "confirmation_words", "watchdog_targets", "rss_feeds",
+                    "project_paths", "backup_targets", "api_keys"):
+        if section not in cfg: errors.append(f"{section}: missing section")
+    if errors: return errors
+
+    string_map("paths", cfg['paths'])
+    string_map("api_keys", cfg['api_keys'])
+    string_map("rss_feeds", cfg['rss_feeds'])
+    string_map("project_paths", cfg['project_paths'])
+    string_map("backup_targets", cfg['backup_targets'])
+    if check("settings", cfg['settings'], dict, "object"):
+        for key in ("push_to_talk_key", "wifi_interface_name"):
+            check(f"settings.{key}", cfg['settings'].get(key), str, "string")
+
+    if check("vad", cfg['vad'], dict, "object") and check("vad.profiles", cfg['vad'].get('profiles'), dict, "object"):
+        for name in ("command", "confirmation"):
+            profile = cfg['vad']['profiles'].get(name)
+            if not check(f"vad.profiles.{name}", profile, dict, "object"): continue
+            path = f"vad.profiles.{name}"
+            check_range(f"{path}.aggressiveness", profile.get('aggressiveness'), int, "integer", 0, 3)
+            for key in ("onset_ms", "hangover_ms", "preroll_ms"):
+                check_range(f"{path}.{key}", profile.get(key), int, "integer", 1)
+            for key in ("timeout", "phrase_time_limit"):
+                if check(f"{path}.{key}", profile.get(key), (int, float), "number") and profile[key] <= 0:
+                    errors.append(f"{path}.{key}: must be greater than 0, got {profile[key]}")
+
+    if check("confirmation_words", cfg['confirmation_words'], list, "list"):
+        for i, word in enumerate(cfg['confirmation_words']):
+            check(f"confirmation_words[{i}]", word, str, "string")
+
+    if check("dialogue_pools", cfg['dialogue_pools'], dict, "object"):
+        for name, lines in cfg['dialogue_pools'].items():
+            if not check(f"dialogue_pools.{name}", lines, list, "list"): continue
+            if not lines: errors.append(f"dialogue_pools.{name}: pool is empty")
+            for i, line in enumerate(lines):
+                check(f"dialogue_pools.{name}[{i}]", line, str, "string")
+
+    if check("watchdog_targets", cfg['watchdog_targets'], dict, "object"):
+        for name, target in entries(cfg['watchdog_targets']):
+            if not check(f"watchdog_targets.{name}", target, dict, "object"): continue
+            for key in ("url", "selector"):
+                check(f"watchdog_targets.{name}.{key}", target.get(key), str, "string")
+
+    if check("janitor", cfg['janitor'], dict, "object"):
+        janitor = cfg['janitor']
+        if check("janitor.rules", janitor.get('rules'), dict, "object"):
+            for folder, extensions in entries(janitor['rules']):
+                if not check(f"janitor.rules.{folder}", extensions, list, "list"): continue
+                for i, ext in enumerate(extensions):
+                    if check(f"janitor.rules.{folder}[{i}]", ext, str, "string") and not ext.startswith("."):
+                        errors.append(f"janitor.rules.{folder}[{i}]: extension must start with '.'")
+        string_map("janitor.folders", janitor.get('folders'))
+        check_range("janitor.move_workers", janitor.get('move_workers'), int, "integer", 1)
+        if "skip_duplicates" in janitor: check("janitor.skip_duplicates", janitor['skip_duplicates'], bool, "true/false")
+
+    if check("content_index", cfg['content_index'], dict, "object"):
+        index = cfg['content_index']
+        check("content_index.enabled", index.get('enabled'), bool, "true/false")
+        for key in ("roots", "extensions"):
+            if check(f"content_index.{key}", index.get(key), list, "list"):
+                for i, value in enumerate(index[key]):
+                    check(f"content_index.{key}[{i}]", value, str, "string")
+        for key in ("workers", "refresh_minutes"):
+            check_range(f"content_index.{key}", index.get(key), int, "integer", 1)
+        if check("content_index.max_file_mb", index.get('max_file_mb'), (int, float), "number") \
+                and index['max_file_mb'] <= 0:
+            errors.append(f"content_index.max_file_mb: must be greater than 0, got {index['max_file_mb']}")
+
+    command_types = set()
+    if check("commands", cfg['commands'], list, "list"):
+        for i, command in enumerate(cfg['commands']):
+            path = f"commands[{i}]"
+            if not check(path, command, dict, "object"): continue
+            path = f"commands[{i}] ({command.get('name', 'unnamed')})"
+            if check(f"{path}.type", command.get('type'), str, "string"):
+                command_types.add(command['type'])
+            if check(f"{path}.keywords", command.get('keywords'), list, "list"):
+                if not command['keywords']: errors.append(f"{path}.keywords: list is empty")
+                for j, keyword in enumerate(command['keywords']):
+                    if check(f"{path}.keywords[{j}]", keyword, str, "string") and not keyword.strip():
+                        errors.append(f"{path}.keywords[{j}]: keyword is blank")
+            for key in ("ack", "url_template", "key"):
+                if key in command: check(f"{path}.{key}", command[key], str, "string")
+            if "targets" in command: string_map(f"{path}.targets", command['targets'])
+
+    if check("macros", cfg['macros'], dict, "object"):
+        for name, steps in entries(cfg['macros']):
+            if not check(f"macros.{name}", steps, list, "list"): continue
+            for i, step in enumerate(steps):
+                if not check(f"macros.{name}[{i}]", step, dict, "object"): continue
+                if check(f"macros.{name}[{i}].type", step.get('type'), str, "string") \
+                        and command_types and step['type'] not in command_types:
+                    errors.append(f"macros.{name}[{i}].type: no command has type '{step['type']}'")
+    return errors
+
+def build_command_index(cfg: dict) -> dict:
+    """
+    Precomputes the keyword matchers (longest keyword first, so the first prefix hit
+    is the best one) and a type -> command map for macros.
+    """
+    matchers = [(keyword, command) for command in cfg['commands'] for keyword in command['keywords']]
+    matchers.sort(key=lambda pair: len(pair[0]), reverse=True) # Stable: config order breaks ties
+    by_type = {}
+    for command in cfg['commands']:
+        by_type.setdefault(command['type'], command)
+    return {"matchers": matchers, "by_type": by_type}
+
+def resolve_home_path(name: str) -> Path:
+    """Absolute paths are kept; anything else is taken relative to the home folder."""
+    path = Path(name).expanduser()
+    return path if path.is_absolute() else Path.home() / path
+
+def build_janitor_map(cfg: dict) -> dict:
+    """Flattens the janitor rules into an extension -> destination folder lookup."""
+    ext_map = {}
+    for folder, extensions in cfg['janitor']['rules'].items():
+        if folder == "_comment": continue
+        for ext in extensions:
+            ext_map.setdefault(ext.lower(), resolve_home_path(folder))
+    return ext_map
+
+def prewarm_dialogue_cache(lines):
+    """Renders dialogue lines into the TTS cache so their first use is instant."""
+    for text in lines:
+        try:
+            _, was_cached = cache_dialogue_line(text)
+            if not was_cached: safe_print(f"BT-7274 (Pre-cached): {text}")
+        except Exception as e:
+            safe_print(f"ERROR: Could not pre-cache '{text}': {e}")
+
+def apply_config(new_config: dict):
+    """Swaps in a validated config and rebuilds only what depends on changed sections."""
+    global CONFIG, runtime
+    old_config = CONFIG
+    # Paths (Piper, voice, caches) and Spotify credentials are pinned to the startup values,
+    # otherwise a new voice would be spliced with fragments cached from the old one.
+    for section in RESTART_ONLY_SECTIONS:
+        if new_config.get(section) != old_config.get(section):
+            safe_print(f"WARNING: Changes to '{section}' in config.json take effect after a restart.")
+            if section in old_config: new_config[section] = old_config[section]
+            else: new_config.pop(section, None)
+    changed = {k for k in set(old_config) | set(new_config) if old_config.get(k) != new_config.get(k)}
+    changed.discard("_comment")
+    if not changed: return
+
+    runtime = {
+        "config": new_config,
+        "command_index": build_command_index(new_config) if "commands" in changed else runtime["command_index"],
+        "janitor_map": build_janitor_map(new_config) if "janitor" in changed else runtime["janitor_map"],
+    }
+    CONFIG = new_config
+    safe_print(f"Config reloaded. Updated sections: {', '.join(sorted(changed))}.")
+
+    if "dialogue_pools" in changed:
+        old_lines = {line for lines in old_config['dialogue_pools'].values() for line in lines}
+        new_lines = [line for lines in new_config['dialogue_pools'].values() for line in lines
+                     if line not in old_lines]
+        if new_lines:
+            threading.Thread(target=prewarm_dialogue_cache, args=(new_lines,), daemon=True).start()
+
+    if "watchdog_targets" in changed:
+        # A retargeted watchdog must not compare against the old page's hash.
+        stale = [name for name in watchdog_data
+                 if old_config['watchdog_targets'].get(name) != new_config['watchdog_targets'].get(name)]
+        for name in stale: watchdog_data.pop(name, None)
+        if stale: save_memory_file(WATCHDOG_FILE_PATH, watchdog_data)
+
+    if old_config['settings'].get('push_to_talk_key') != new_config['settings'].get('push_to_talk_key'):
+        safe_print("WARNING: A new push_to_talk_key takes effect after a restart.")
+
+def reload_config():
+    """Re-reads config.json. An invalid edit is reported and the running config is kept."""
+    try:
+        with open(CONFIG_PATH, "r") as f:
+            new_config = json.load(f)
+    except json.JSONDecodeError as e:
+        safe_print(f"ERROR: config.json line {e.lineno}, column {e.colno}: {e.msg}. Keeping current config.")
+        return
+    except OSError as e:
+        safe_print(f"ERROR: Could not read config.json: {e}. Keeping current config.")
+        return
+
+    errors = validate_config(new_config)
+    if errors:
+        safe_print("ERROR: config.json rejected, keeping current config:")
+        for error in errors: safe_print(f"  - {error}")
+        return
+    apply_config(new_config)
+
+def watch_config():
+    """Polls config.json and reloads it once an edit has settled."""
+    last_mtime = CONFIG_PATH.stat().st_mtime
+    while True:
+        time.sleep(CONFIG_POLL_SECONDS)
+        try:
+            mtime = CONFIG_PATH.stat().st_mtime
+            if mtime == last_mtime: continue
+            time.sleep(0.25) # Let editors finish writing
+            if CONFIG_PATH.stat().st_mtime != mtime: continue
+        except OSError:
+            continue
+        last_mtime = mtime
+        reload_config()
+
+# ==============================================================================
+# ---------- JANITOR ENGINE ----------
+# ==============================================================================
+
+def file_digest(file_path, limit=None) -> str:
+    """Hashes the first `limit` bytes of a file, or the whole file if limit is None."""
+    digest = hashlib.blake2b(digest_size=16)
+    remaining = limit
+    with open(file_path, "rb") as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(1024 * 1024 if remaining is None else min(1024 * 1024, remaining))
+            if not chunk: break
+            digest.update(chunk)
+            if remaining is not None: remaining -= len(chunk)
+    return digest.hexdigest()
+
+def device_of(path: Path) -> int:
+    """st_dev of the path, or of its nearest existing parent if it doesn't exist yet."""
+    for candidate in (path, *path.parents):
+        try: return candidate.stat().st_dev
+        except OSError: continue
+    return -1
+
+def unique_target(dest_dir: Path, name: str, taken: set) -> Path:
+    """Picks 'name', 'name (1)', 'name (2)'... avoiding names already taken (case-insensitive)."""
+    stem, suffix = os.path.splitext(name)
+    candidate, n = name, 1
+    while candidate.lower() in taken:
+        candidate = f"{stem} ({n}){suffix}"
+        n += 1
+    taken.add(candidate.lower())
+    return dest_dir / candidate
+
+def plan_janitor(source_dir: Path, state: dict) -> dict:
+    """
+    Scans source_dir once and plans where each file goes. Files whose content
+    already exists at the destination (or earlier in this plan) are listed as
+    duplicates and not moved. Contents are only read for files of equal size,
+    first as a 64 KB prefix hash and then, if still equal, a full hash.
+    """
+    janitor_map, settings = state["janitor_map"], state["config"]['janitor']
+    moves, duplicates = [], []
+    dest_state = {} # dest_dir -> {"names": set, "by_size": {size: [paths]}, "cross_device": bool}
+    partial_hashes, full_hashes = {}, {}
+    source_device = device_of(source_dir)
+
+    def same_content(a: Path, b: Path, size: int) -> bool:
+        try:
+            for cache, limit in ((partial_hashes, JANITOR_PARTIAL_BYTES), (full_hashes, None)):
+                for path in (a, b):
+                    if path not in cache: cache[path] = file_digest(path, limit)
+                if cache[a] != cache[b]: return False
+                if size <= JANITOR_PARTIAL_BYTES: return True
+            return True
+        except OSError:
+            return False
+
+    def state_for(dest_dir: Path) -> dict:
+        if dest_dir not in dest_state:
+            names, by_size = set(), {}
+            if dest_dir.is_dir():
+                with os.scandir(dest_dir) as it:
+                    for entry in it:
+                        names.add(entry.name.lower())
+                        if entry.is_file():
+                            by_size.setdefault(entry.stat().st_size, []).append(Path(entry.path))
+            dest_state[dest_dir] = {"names": names, "by_size": by_size,
+                                    "cross_device": device_of(dest_dir) != source_device}
+        return dest_state[dest_dir]
+
+    with os.scandir(source_dir) as it:
+        entries = sorted((e for e in it if e.is_file()), key=lambda e: e.name.lower())
+
+    for entry in entries:
+        dest_dir = janitor_map.get(os.path.splitext(entry.name)[1].lower())
+        if dest_dir is None or dest_dir == source_dir: continue
+        dest = state_for(dest_dir)
+        source, size = Path(entry.path), entry.stat().st_size
+
+        same_size = dest["by_size"].setdefault(size, [])
+        if settings.get('skip_duplicates', True) and \
+                any(same_content(source, other, size) for other in same_size):
+            duplicates.append(source)
+            continue
+        same_size.append(source)
+        moves.append({"source": source,
+                      "target": unique_target(dest_dir, entry.name, dest["names"]),
+                      "cross_device": dest["cross_device"]})
+    return {"source": source_dir, "moves": moves, "duplicates": duplicates,
+            "move_workers": settings['move_workers']}
+
+def execute_janitor_plan(plan: dict) -> int:
+    """Runs a janitor plan. Same-volume renames run inline; cross-volume copies run in parallel."""
+    for dest_dir in {move["target"].parent for move in plan["moves"]}:
+        dest_dir.mkdir(parents=True, exist_ok=True)
+
+    def move_file(move) -> bool:
+        try:
+            shutil.move(str(move["source"]), str(move["target"]))
+            return True
+        except Exception as e:
+            safe_print(f"Failed to move {move['source'].name}: {e}")
+            return False
+
+    moved = sum(move_file(move) for move in plan["moves"] if not move["cross_device"])
+    remote = [move for move in plan["moves"] if move["cross_device"]]
+    if remote:
+        with ThreadPoolExecutor(max_workers=max(1, int(plan["move_workers"]))) as pool:
+            moved += sum(pool.map(move_file, remote))
+    return moved
+
+# ==============================================================================
+# ---------- DOCUMENT CONTENT INDEX ----------
+# ==============================================================================
+
+def tokenize(text: str) -> list:
+    return [t for t in CONTENT_TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in CONTENT_STOPWORDS]
+
+def extract_text(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix == ".pdf":
+        if not HAS_PDF: raise RuntimeError("pypdf is not installed")
+        return "\n".join(page.extract_text() or "" for page in PdfReader(str(path)).pages)
+    if suffix == ".docx":
+        if not HAS_DOCX: raise RuntimeError("python-docx is not installed")
+        return "\n".join(p.text for p in docx.Document(str(path)).paragraphs)
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read(CONTENT_MAX_CHARS)
+
+def extract_document_terms(path: str):
+    """Process-pool worker: returns (path, term counts, token count), or (path, None, -1) if extraction failed."""
+    try:
+        tokens = tokenize(extract_text(Path(path))[:CONTENT_MAX_CHARS])
+    except Exception:
+        return path, None, -1
+    return path, collections.Counter(tokens), len(tokens)
+
+def open_content_index() -> sqlite3.Connection:
+    conn = sqlite3.connect(CONTENT_INDEX_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS docs (
+            id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, mtime REAL NOT NULL, length INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS postings (
+            term TEXT NOT NULL, doc_id INTEGER NOT NULL, tf INTEGER NOT NULL,
+            PRIMARY KEY (term, doc_id)) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+    """)
+    return conn
+
+def iter_index_candidates(root: Path, extensions: set, max_bytes: int):
+    """Yields (path, mtime) for indexable files under root, using scandir's cached stat."""
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.name.startswith("."): continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in extensions:
+                        st = entry.stat()
+                        if st.st_size <= max_bytes: yield entry.path, st.st_mtime
+        except OSError:
+            continue
+
+def refresh_content_index():
+    """Brings the index up to date: new or modified files are re-extracted, deleted ones dropped."""
+    settings = CONFIG['content_index']
+    extensions = {ext.lower() for ext in settings['extensions']}
+    # Without an extractor these files are skipped outright, so they get indexed once it's installed.
+    if not HAS_PDF: extensions.discard(".pdf")
+    if not HAS_DOCX: extensions.discard(".docx")
+    max_bytes = int(settings['max_file_mb'] * 1024 * 1024)
+
+    conn = open_content_index()
+    try:
+        known = dict(conn.execute("SELECT path, mtime FROM docs"))
+        current = {}
+        for root in settings['roots']:
+            current.update(iter_index_candidates(resolve_home_path(root), extensions, max_bytes))
+
+        removed = [path for path in known if path not in current]
+        for path in removed:
+            doc_id = conn.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()[0]
+            conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+            conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+        conn.commit()
+
+        stale = [path for path, mtime in current.items() if known.get(path) != mtime]
+        if not stale: return
+        safe_print(f"Content index: extracting {len(stale)} documents...")
+        failed = 0
+        with ProcessPoolExecutor(max_workers=int(settings['workers'])) as pool:
+            for n, (path, counts, length) in enumerate(pool.map(extract_document_terms, stale, chunksize=16), 1):
+                # A file that can't be read is kept as a length -1 row with no postings, so it's
+                # only retried once its mtime changes. BM25 statistics skip these rows.
+                row = conn.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()
+                if row:
+                    doc_id = row[0]
+                    conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+                    conn.execute("UPDATE docs SET mtime = ?, length = ? WHERE id = ?", (current[path], length, doc_id))
+                else:
+                    doc_id = conn.execute("INSERT INTO docs (path, mtime, length) VALUES (?, ?, ?)",
+                                          (path, current[path], length)).lastrowid
+                if counts is None:
+                    failed += 1
+                else:
+                    conn.executemany("INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                                     ((term, doc_id, tf) for term, tf in counts.items()))
+                if n % 500 == 0: conn.commit()
+        conn.commit()
+        safe_print(f"Content index: {len(stale) - failed} updated, {len(removed)} removed, {failed} unreadable.")
+    finally:
+        conn.close()
+
+def content_indexer():
+    """Background loop that keeps the index fresh. Settings are re-read each cycle."""
+    while True:
+        if CONFIG['content_index']['enabled']:
+            try: refresh_content_index()
+            except Exception as e: safe_print(f"ERROR: Content indexing failed: {e}")
+        time.sleep(CONFIG['content_index']['refresh_minutes'] * 60)
+
+def search_content_index(query: str, limit: int = 5) -> list:
+    """Ranks indexed documents against the query with BM25. Returns existing paths, best first."""
+    terms = set(tokenize(query))
+    if not terms or not CONTENT_INDEX_PATH.exists(): return []
+    conn = sqlite3.connect(CONTENT_INDEX_PATH, timeout=30)
+    try:
+        doc_count, avg_length = conn.execute("SELECT COUNT(*), AVG(length) FROM docs WHERE length >= 0").fetchone()
+        if not doc_count: return []
+        avg_length = avg_length or 1.0
+        scores = {}
+        for term in terms:
+            rows = conn.execute("SELECT p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc_id "
+                                "WHERE p.term = ?", (term,)).fetchall()
+            if not rows: continue
+            idf = math.log(1 + (doc_count - len(rows) + 0.5) / (len(rows) + 0.5))
+            for doc_id, tf, length in rows:
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        results = []
+        for doc_id, _ in heapq.nlargest(limit * 2, scores.items(), key=lambda kv: kv[1]):
+            path = Path(conn.execute("SELECT path FROM docs WHERE id = ?", (doc_id,)).fetchone()[0])
+            if path.exists(): results.append(path)
+        return results[:limit]
+    finally:
+        conn.close()
+
 # ==============================================================================
 # ---------- COMMAND PROCESSING (Bug Fix Included) ----------
 # ==============================================================================
@@ -238,53 +1044,51 @@ def process_command(query: str):
     if not query or query == "None":
         return
 
-    best_match_command, best_match_len, best_match_keyword = None, 0, ""
-
-    for command in CONFIG['commands']:
-        for keyword in command['keywords']:
-            if query.startswith(keyword):
-                if len(keyword) > best_match_len:
-                    best_match_len = len(keyword)
-                    best_match_command = command
-                    best_match_keyword = keyword
+    state = runtime # One snapshot per command; a reload mid-command doesn't mix configs
+    best_match_command, best_match_keyword = next(
+        ((command, keyword) for keyword, command in state["command_index"]["matchers"] if query.startswith(keyword)),
+        (None, ""))
 
     if best_match_command:
         command = best_match_command
         if "ack" in command:
-            speak(command["ack"])
+            speak(command["ack"], SPEECH_CHATTER)
         
         query_data = query.replace(best_match_keyword, "", 1).strip()
         last_context["search"] = query_data if "search" in command['type'] else None
         
-        execute_action(command, query_data)
+        execute_action(command, query_data, state)
         return
                 
     speak("error")
 
 
-def execute_action(command: dict, query_data: str):
+def execute_action(command: dict, query_data: str, state: dict = None):
     """Executes the action defined in the matched command object."""
     action_type = command['type']
     global last_context, memory_data, watchdog_data
+    state = state or runtime
+    cfg = state["config"]
     
     try:
         # --- Script Shutdown ---
         if action_type == "script.shutdown":
-            speak("shutdown")
-            time.sleep(2)
+            speak("shutdown", wait=True)
             os._exit(0)
 
         # --- System Commands ---
         elif action_type == "system.status":
             cpu = psutil.cpu_percent(interval=1)
             mem = psutil.virtual_memory().percent
-            status_report = f"All systems nominal. CPU at {cpu} percent. Memory at {mem} percent."
+            # Whole percentages keep the spoken numbers inside the pre-rendered fragment set.
+            status_template, slots = TEMPLATE_STATUS, {"cpu": round(cpu), "mem": round(mem)}
             try:
                 battery = psutil.sensors_battery()
                 if battery:
-                    status_report += f" Battery is at {battery.percent} percent."
+                    status_template += TEMPLATE_BATTERY
+                    slots["battery"] = round(battery.percent)
             except AttributeError: pass
-            speak(status_report)
+            speak_template(status_template, **slots)
         
         # --- NEW: Top Processes ---
         elif action_type == "system.top_processes":
@@ -319,15 +1123,15 @@ def execute_action(command: dict, query_data: str):
                 value = int(re.findall(r'\d+', query_data)[0])
                 if 0 <= value <= 100:
                     sbc.set_brightness(value)
-                    speak(f"Brightness set to {value} percent.")
+                    speak_template(TEMPLATE_BRIGHTNESS, value=value)
             except Exception as e:
                 safe_print(f"ERROR: Brightness control failed: {e}")
 
         elif action_type in ["system.wifi_on", "system.wifi_off"]:
             try:
-                iface = CONFIG['settings']['wifi_interface_name']
-                state = "enable" if action_type == "system.wifi_on" else "disable"
-                cmd = f'netsh interface set interface "{iface}" admin={state}'
+                iface = cfg['settings']['wifi_interface_name']
+                admin_state = "enable" if action_type == "system.wifi_on" else "disable"
+                cmd = f'netsh interface set interface "{iface}" admin={admin_state}'
                 subprocess.run(cmd, check=True, shell=True, 
                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             except Exception as e:
@@ -363,10 +1167,10 @@ def execute_action(command: dict, query_data: str):
                 speak("Watchdog modules are not installed, Pilot."); return
             
             target_name = query_data.lower()
-            if not target_name or target_name not in CONFIG['watchdog_targets']:
+            if not target_name or target_name not in cfg['watchdog_targets']:
                 speak("Please specify a valid watchdog target."); return
             
-            target = CONFIG['watchdog_targets'][target_name]
+            target = cfg['watchdog_targets'][target_name]
             speak(f"Checking watchdog for {target_name}...")
             try:
                 headers = {'User-Agent': 'Mozilla/5.0'}
@@ -396,10 +1200,10 @@ def execute_action(command: dict, query_data: str):
                 speak("RSS Feed module is not installed."); return
             
             feed_name = query_data.lower()
-            if not feed_name or feed_name not in CONFIG['rss_feeds']:
+            if not feed_name or feed_name not in cfg['rss_feeds']:
                 speak("Please specify a valid feed to check."); return
             
-            feed_url = CONFIG['rss_feeds'][feed_name]
+            feed_url = cfg['rss_feeds'][feed_name]
             feed = feedparser.parse(feed_url)
             
             if not feed.entries:
@@ -504,6 +1308,20 @@ def execute_action(command: dict, query_data: str):
             else:
                 speak(f"I could not locate any files matching {query_data}.")
 
+        # --- NEW: Document Content Search ---
+        elif action_type == "file.content_search":
+            if not cfg['content_index']['enabled']:
+                speak("Document indexing is disabled, Pilot."); return
+            if not query_data: speak("Please specify what the document is about."); return
+            results = search_content_index(query_data)
+            if results:
+                best = results[0]
+                speak(f"The best match is {best.name} in your {best.parent.name} folder. Opening it.")
+                os.startfile(best)
+                last_context["file"] = best
+            else:
+                speak(f"I found no documents about {query_data}.")
+
         # --- NEW: File Move (Context-Aware) ---
         elif action_type == "file.move":
             target_file = None
@@ -532,7 +1350,7 @@ def execute_action(command: dict, query_data: str):
                 if dest_path and dest_path.exists():
                     try:
                         shutil.move(str(target_file), str(dest_path / target_file.name))
-                        speak(f"Moved {target_file.name} to {destination_name}.")
+                        speak_template(TEMPLATE_MOVED, name=target_file.name, dest=destination_name)
                         last_context["file"] = dest_path / target_file.name # Update context
                     except Exception as e:
                         safe_print(f"ERROR: File move failed: {e}")
@@ -554,7 +1372,7 @@ def execute_action(command: dict, query_data: str):
             if not target_file:
                 speak("I could not find the file to delete."); return
             
-            speak(f"Confirm: delete {target_file.name}?")
+            speak(f"Confirm: delete {target_file.name}?", SPEECH_CRITICAL)
             if get_confirmation():
                 try:
                     os.remove(target_file)
@@ -567,37 +1385,34 @@ def execute_action(command: dict, query_data: str):
                 speak("Deletion aborted.")
 
         elif action_type == "file.desktop_janitor":
-            speak("Acknowledged. Sorting non-essential files.")
-            desktop_path = Path.home() / "Desktop"
-            targets = {
-                "Pictures": [".png", ".jpg", ".jpeg"],
-                "Videos": [".mp4", ".mkv", ".mov"],
-                "Downloads": [".zip", ".rar", ".exe", ".msi"],
-                "Documents": [".pdf", ".docx", ".txt", ".csv"]
-            }
-            file_count = 0
-            for item in desktop_path.glob("*"):
-                if not item.is_file(): continue
-                for folder_name, extensions in targets.items():
-                    if item.suffix.lower() in extensions:
-                        target_dir = Path.home() / folder_name
-                        target_dir.mkdir(exist_ok=True)
-                        try:
-                            shutil.move(str(item), str(target_dir / item.name))
-                            file_count += 1
-                        except Exception as e:
-                            safe_print(f"Failed to move {item.name}: {e}")
-                        break
-            speak(f"Desktop cleanup complete. {file_count} files were sorted.")
+            dry_run = "dry run" in query_data or "preview" in query_data
+            folder_name = query_data.replace("dry run", "").replace("preview", "").strip() or "desktop"
+            folders = cfg['janitor']['folders']
+            source_dir = resolve_home_path(folders.get(folder_name, folder_name))
+            if not source_dir.is_dir():
+                speak(f"I could not find a folder called {folder_name}."); return
+
+            speak("Acknowledged. Sorting non-essential files.", SPEECH_CHATTER)
+            plan = plan_janitor(source_dir, state)
+            duplicate_note = f" {len(plan['duplicates'])} duplicates left in place." if plan["duplicates"] else ""
+            if dry_run:
+                for move in plan["moves"]:
+                    safe_print(f"Janitor plan: {move['source'].name} -> {move['target']}")
+                for duplicate in plan["duplicates"]:
+                    safe_print(f"Janitor plan: {duplicate.name} is a duplicate, skipping.")
+                speak(f"Dry run complete. {len(plan['moves'])} files would be sorted.{duplicate_note}")
+            else:
+                file_count = execute_janitor_plan(plan)
+                speak(f"{folder_name.capitalize()} cleanup complete. {file_count} files were sorted.{duplicate_note}")
 
         # --- NEW: Backup Protocol ---
         elif action_type == "backup.run":
             target_name = query_data.lower()
-            if not target_name or target_name not in CONFIG['backup_targets']:
+            if not target_name or target_name not in cfg['backup_targets']:
                 speak("Please specify a valid backup target."); return
             
-            source_dir = CONFIG['backup_targets'][target_name]
-            backup_dir = Path(CONFIG['paths']['backup_dir'])
+            source_dir = cfg['backup_targets'][target_name]
+            backup_dir = Path(cfg['paths']['backup_dir'])
             backup_dir.mkdir(exist_ok=True)
             
             timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H%M')
@@ -614,18 +1429,18 @@ def execute_action(command: dict, query_data: str):
         # --- Macro Execution ---
         elif action_type == "macro.run":
             macro_name = query_data.lower()
-            if macro_name in CONFIG['macros']:
-                speak(f"Executing macro: {macro_name}.")
-                for step in CONFIG['macros'][macro_name]:
+            if macro_name in cfg['macros']:
+                speak(f"Executing macro: {macro_name}.", SPEECH_CHATTER)
+                for step in cfg['macros'][macro_name]:
                     try:
                         step_type = step['type']
                         step_data = step.get('data', "")
-                        step_command = next((cmd for cmd in CONFIG['commands'] if cmd['type'] == step_type), None)
+                        step_command = state["command_index"]["by_type"].get(step_type)
                         
                         if step_command:
                             safe_print(f"Macro step: {step_type} | Data: {step_data}")
-                            while is_speaking.is_set(): time.sleep(0.1)
-                            execute_action(step_command, step_data)
+                            wait_for_speech()
+                            execute_action(step_command, step_data, state)
                             time.sleep(1.0) # Buffer between macro commands
                         else:
                             safe_print(f"Macro Warning: Command type '{step_type}' not found.")
@@ -639,10 +1454,10 @@ def execute_action(command: dict, query_data: str):
         elif action_type == "git.status":
             if not HAS_GIT: speak("Git module not installed."); return
             project_name = query_data.lower()
-            if not project_name or project_name not in CONFIG['project_paths']:
+            if not project_name or project_name not in cfg['project_paths']:
                 speak("Please specify a valid project."); return
             
-            repo_path = CONFIG['project_paths'][project_name]
+            repo_path = cfg['project_paths'][project_name]
             try:
                 repo = git.Repo(repo_path)
                 if not repo.is_dirty(untracked_files=True):
@@ -658,10 +1473,10 @@ def execute_action(command: dict, query_data: str):
         elif action_type == "git.commit_push":
             if not HAS_GIT: speak("Git module not installed."); return
             project_name = query_data.lower()
-            if not project_name or project_name not in CONFIG['project_paths']:
+            if not project_name or project_name not in cfg['project_paths']:
                 speak("Please specify a valid project."); return
             
-            repo_path = CONFIG['project_paths'][project_name]
+            repo_path = cfg['project_paths'][project_name]
             try:
                 repo = git.Repo(repo_path)
                 if not repo.is_dirty(untracked_files=True):
@@ -678,7 +1493,9 @@ def execute_action(command: dict, query_data: str):
 
         # --- General & Utility Commands ---
         elif action_type == "general.time":
-            speak(f"The time is {datetime.datetime.now():%H:%M}.")
+            now = datetime.datetime.now()
+            minute = "hundred" if now.minute == 0 else f"oh {now.minute}" if now.minute < 10 else now.minute
+            speak_template(TEMPLATE_TIME, hour=now.hour, minute=minute)
         
         elif action_type == "general.date":
             speak(f"Today is {datetime.datetime.now().strftime('%A, %B %d, %Y')}.")
@@ -687,8 +1504,8 @@ def execute_action(command: dict, query_data: str):
             speak("jokes")
         
         elif action_type == "api.weather":
-            api_key = CONFIG["api_keys"]["openweather_api_key"]
-            city = CONFIG["api_keys"]["weather_city"]
+            api_key = cfg["api_keys"]["openweather_api_key"]
+            city = cfg["api_keys"]["weather_city"]
             res = requests.get(f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric").json()
             if res["cod"] == 200:
                 speak(f"The current temperature is {res['main']['temp']:.0f} degrees with {res['weather'][0]['description']}.")
@@ -705,28 +1522,34 @@ def execute_action(command: dict, query_data: str):
 # ---------- PTT & INITIALIZATION ----------
 # ==============================================================================
 
-def handle_ptt_flow():
-    """Plays PTT ack, listens, transcribes, and processes."""
-    speak("ptt_ack")
+def handle_ptt_flow(acknowledge: bool = True):
+    """Plays PTT ack, listens, transcribes, and processes. A barge-in skips the ack."""
+    speech_context.generation = speech_generation
+    if acknowledge:
+        speak("ptt_ack", SPEECH_CHATTER, wait=True)
     
     safe_print("LISTENING...")
     audio = None
-    with mic_lock:
-        try:
-            with sr.Microphone() as source:
-                audio = recognizer.listen(source, timeout=5, phrase_time_limit=8)
-        except sr.WaitTimeoutError:
-            pass
-    
-    text = transcribe_audio(audio)
-    is_recording.clear()
+    try:
+        with mic_lock:
+            try:
+                with open_microphone() as source:
+                    audio = listen_with_vad(source, "command")
+            except sr.WaitTimeoutError:
+                pass
+            except Exception as e:
+                safe_print(f"ERROR: Listening failed: {e}")
+        text = transcribe_audio(audio)
+    finally:
+        # Must always clear, or every later PTT press is ignored.
+        is_recording.clear()
     process_command(text)
 
 
 def calibrate_microphone():
     safe_print("Calibrating microphone for ambient noise...")
     with mic_lock:
-        with sr.Microphone() as source:
+        with open_microphone() as source:
             recognizer.adjust_for_ambient_noise(source, duration=1.5)
     safe_print("Calibration complete.")
 
@@ -762,8 +1585,19 @@ def initialize_spotify():
 
 def initialize_systems():
     """CalGibrates mic, initializes Spotify, and loads memory."""
-    global memory_data, watchdog_data
+    global memory_data, watchdog_data, runtime
+    errors = validate_config(CONFIG)
+    if errors:
+        safe_print("FATAL ERROR: config.json is invalid:")
+        for error in errors: safe_print(f"  - {error}")
+        sys.exit(1)
+    runtime = {"config": CONFIG, "command_index": build_command_index(CONFIG),
+               "janitor_map": build_janitor_map(CONFIG)}
+    threading.Thread(target=watch_config, daemon=True).start()
+    threading.Thread(target=content_indexer, daemon=True).start()
     psutil.cpu_percent(interval=None) # Prime psutil
+    start_speech_scheduler()
+    threading.Thread(target=prewarm_fragments, daemon=True).start()
     calibrate_microphone()
     initialize_spotify()
     memory_data = load_memory_file(MEMORY_FILE_PATH)
@@ -782,9 +1616,11 @@ def main():
         sys.exit(1)
     
     def on_press(key):
-        if key == ptt_key and not is_speaking.is_set() and not is_recording.is_set():
-            is_recording.set()
-            threading.Thread(target=handle_ptt_flow, daemon=True).start()
+        if key != ptt_key or is_recording.is_set(): return
+        barge_in = is_speaking.is_set() or bool(speech_pending)
+        if barge_in: interrupt_speech()
+        is_recording.set()
+        threading.Thread(target=handle_ptt_flow, args=(not barge_in,), daemon=True).start()
 
     with KeyboardListener(on_press=on_press) as listener:
         safe_print(f"BT-7274 INITIALIZED. Press {ptt_key_str.upper()} to speak.")
@@ -792,8 +1628,7 @@ def main():
             listener.join()
         except KeyboardInterrupt:
             safe_print("\nShutdown signal received.")
-            speak("shutdown")
-            time.sleep(2)
+            speak("shutdown", wait=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file